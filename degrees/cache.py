@@ -0,0 +1,252 @@
+import dbm
+import json
+from collections import OrderedDict
+
+# Key under which an on-disk cache records the data it was built from
+FINGERPRINT = "__fingerprint__"
+
+
+class PathCache():
+    """
+    Bounded LRU cache of shortest paths between pairs of people.
+
+    Pairs are stored once, unordered: a cached path from A to B also
+    answers B to A, reversed. The cache also keeps the parent trees of
+    the last few breadth-first searches, which answer any later query
+    from or to their root that they reach without searching again.
+
+    With a `path`, answers are also kept in a dbm file, which is
+    cleared if it was written for data with another `fingerprint`.
+    Only one process may write to the file: others open it with
+    open_read_only and hand their new answers, kept in `pending`, to
+    the writer.
+    """
+
+    def __init__(self, maxsize=4096, trees=8, path=None, fingerprint=None):
+        self.maxsize = maxsize
+        self.max_trees = trees
+        self.paths = OrderedDict()
+        self.trees = OrderedDict()
+        self.path = path
+        self.disk = None
+        self.read_only = False
+        self.pending = []
+        if path is not None:
+            self.disk = dbm.open(path, "c")
+            stored = self.disk.get(FINGERPRINT)
+            if stored is not None and stored.decode("utf-8") != json.dumps(fingerprint):
+                self.disk.close()
+                self.disk = dbm.open(path, "n")
+            self.stamp(fingerprint)
+
+    def stamp(self, fingerprint):
+        """
+        Records which data the on-disk answers are for.
+        """
+        if self.disk is not None:
+            self.disk[FINGERPRINT] = json.dumps(fingerprint)
+
+    def get(self, source, target):
+        """
+        Returns (True, path) for a cached answer from source to target,
+        where path may be None if they are not connected, or
+        (False, None) if nothing is cached for the pair.
+        """
+        key = _key(source, target)
+        if key in self.paths:
+            self.paths.move_to_end(key)
+            path = self.paths[key]
+        elif self.disk is not None and _disk_key(key) in self.disk:
+            path = json.loads(self.disk[_disk_key(key)])
+            if path is not None:
+                path = [tuple(step) for step in path]
+            self._remember(key, path)
+        else:
+            return False, None
+        return True, _orient(key, source, path)
+
+    def put(self, source, target, path):
+        """
+        Cache the answer for a pair of people.
+        """
+        key = _key(source, target)
+        path = _orient((source, target), key[0], path)
+        self._remember(key, path)
+        if self.read_only:
+            self.pending.append((key[0], key[1], path))
+        elif self.disk is not None:
+            self.disk[_disk_key(key)] = json.dumps(path)
+
+    def open_read_only(self):
+        """
+        Opens the on-disk answers for reading only, keeping new answers
+        in `pending` instead of writing them.
+        """
+        self.close()
+        self.disk = dbm.open(self.path, "r")
+        self.read_only = True
+
+    def reopen(self):
+        """
+        Opens the on-disk answers for writing again after close().
+        """
+        self.close()
+        self.disk = dbm.open(self.path, "c")
+        self.read_only = False
+
+    def take_pending(self):
+        """
+        Returns and forgets the (source, target, path) answers found
+        since the file was opened read-only.
+        """
+        pending = self.pending
+        self.pending = []
+        return pending
+
+    def add_tree(self, root, parents, complete=False):
+        """
+        Keep a search tree mapping each state reached from `root` to
+        its (parent, action) pair, with None for the root itself. The
+        tree must hold shortest paths, as breadth-first search gives.
+        `complete` means every state connected to the root is in it.
+        """
+        self.trees[root] = (parents, complete)
+        self.trees.move_to_end(root)
+        if len(self.trees) > self.max_trees:
+            self.trees.popitem(last=False)
+
+    def tree_path(self, source, target):
+        """
+        Returns (True, path) if a kept tree rooted at either state
+        answers the query, in the state space of the tree, else
+        (False, None).
+        """
+        for root, other in ((source, target), (target, source)):
+            if root not in self.trees:
+                continue
+            parents, complete = self.trees[root]
+            self.trees.move_to_end(root)
+            if other in parents:
+                path = []
+                state = other
+                while parents[state] is not None:
+                    parent, action = parents[state]
+                    path.append((action, state))
+                    state = parent
+                path.reverse()
+                return True, _orient((root, other), source, path)
+            if complete:
+                return True, None
+        return False, None
+
+    def invalidate(self, edges, still_shortest):
+        """
+        Drops what new co-star `edges` may have made wrong, after they
+        were added to the graph.
+
+        A kept tree stays only if every edge joins two states it holds
+        at depths at most one apart, or two states it does not hold
+        (which are no closer to the root than anything it holds).
+        Cached "not connected" answers are dropped, and cached paths
+        are kept only if `still_shortest(source, target, path)` says so.
+        Returns the number of (trees, answers) dropped.
+        """
+        dropped_trees = 0
+        for root in list(self.trees):
+            parents, complete = self.trees[root]
+            depths = {}
+            for a, b in edges:
+                if a in parents and b in parents:
+                    if abs(_depth(parents, a, depths) - _depth(parents, b, depths)) <= 1:
+                        continue
+                elif a not in parents and b not in parents:
+                    continue
+                del self.trees[root]
+                dropped_trees += 1
+                break
+
+        dropped_paths = 0
+        for key, path in list(self.paths.items()):
+            if path is None or not still_shortest(key[0], key[1], path):
+                del self.paths[key]
+                dropped_paths += 1
+        if self.disk is not None:
+            for stored in list(self.disk.keys()):
+                if stored == FINGERPRINT.encode("utf-8"):
+                    continue
+                key = tuple(json.loads(stored))
+                path = json.loads(self.disk[stored])
+                if path is None or not still_shortest(key[0], key[1], path):
+                    del self.disk[stored]
+                    if key not in self.paths:
+                        dropped_paths += 1
+        return dropped_trees, dropped_paths
+
+    def discard(self, source, target):
+        key = _key(source, target)
+        self.paths.pop(key, None)
+        if self.disk is not None and _disk_key(key) in self.disk:
+            del self.disk[_disk_key(key)]
+
+    def clear(self):
+        self.paths.clear()
+        self.trees.clear()
+        if self.disk is not None:
+            for key in list(self.disk.keys()):
+                if key != FINGERPRINT.encode("utf-8"):
+                    del self.disk[key]
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+
+    def _remember(self, key, path):
+        self.paths[key] = path
+        self.paths.move_to_end(key)
+        if len(self.paths) > self.maxsize:
+            self.paths.popitem(last=False)
+
+
+def reverse_path(source, path):
+    """
+    Turns a (movie_id, person_id) path starting at `source` around,
+    so it leads from its last person back to `source`.
+    """
+    people = [source] + [person for _, person in path]
+    return [(path[i][0], people[i]) for i in range(len(path) - 1, -1, -1)]
+
+
+def _depth(parents, state, depths):
+    """
+    Returns the depth of `state` in a tree of parents, remembering
+    the depths found along the way in `depths`.
+    """
+    chain = []
+    while state not in depths and parents[state] is not None:
+        chain.append(state)
+        state = parents[state][0]
+    depth = depths.get(state, 0)
+    depths[state] = depth
+    for state in reversed(chain):
+        depth += 1
+        depths[state] = depth
+    return depths[chain[0]] if chain else depth
+
+
+def _key(source, target):
+    return (source, target) if source <= target else (target, source)
+
+
+def _disk_key(key):
+    return json.dumps(key)
+
+
+def _orient(pair, source, path):
+    """
+    Returns `path`, which leads from pair[0] to pair[1], as seen
+    from `source`.
+    """
+    if path is None or pair[0] == source:
+        return path
+    return reverse_path(pair[0], path)
@@ -1,31 +1,108 @@
+import argparse
 import csv
+import io
+import json
+import math
+import multiprocessing
+import os
 import sys
+from collections import Counter
 
-from util import Node, StackFrontier, QueueFrontier
+from array import array
+
+from cache import PathCache
+from graph import CoStars, CompactGraph
+from landmarks import Landmarks
+from nameindex import NameIndex
+from snapshot import fingerprint, load_snapshot, save_snapshot
+from util import Node, IndexedQueueFrontier, PriorityFrontier, SearchStats
 
 # Maps names to a set of corresponding person_ids
 names = {}
 
+# NameIndex over the names above, for ranked, prefix and fuzzy lookups
+name_index = None
+
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
 people = {}
 
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# CompactGraph of who starred in what, when loaded with compact=True.
+# The movies and stars sets above are left out in that case.
+graph = None
+
+# CoStars projection used to expand people during searches, if enabled
+costars = None
+
+# Landmarks for bounds and the "alt" strategy, once built
+landmarks = None
+
+# PathCache consulted by shortest_path, if enabled
+path_cache = None
+
+# Sizes and modification times of the CSV files last loaded
+data_fingerprint = None
+
+# CompactGraph built from the dictionaries for whole-graph operations,
+# when load_data was not compact
+_derived_graph = None
+
+# Default snapshot file name, inside the data directory
+SNAPSHOT = "degrees.snapshot"
+
+# Search strategies accepted by shortest_path
+STRATEGIES = ("bfs", "bidirectional", "alt")
+
+# Number of landmarks picked by build_landmarks by default
+LANDMARKS = 16
+
+# Number of landmarks consulted by each "alt" search
+ACTIVE_LANDMARKS = 4
+
 
-def load_data(directory):
+def load_data(directory, compact=False, snapshot=None):
     """
     Load data from CSV files into memory.
+
+    With `compact`, who starred in what is stored in an integer-indexed
+    CompactGraph instead of sets of ids on each person and movie.
+
+    `snapshot` (True for the default file in `directory`, or a path)
+    implies `compact`: the data is memory-mapped from a snapshot file
+    if one exists for the current CSV files, and one is written otherwise.
     """
+    global graph, data_fingerprint, name_index
+
+    data_fingerprint = fingerprint(directory)
+    if snapshot:
+        path = os.path.join(directory, SNAPSHOT) if snapshot is True else snapshot
+        sources = data_fingerprint
+        loaded = load_snapshot(path, sources)
+        if loaded is not None:
+            graph, loaded_people, loaded_movies, loaded_names, name_index = loaded
+            people.update(loaded_people)
+            movies.update(loaded_movies)
+            names.update(loaded_names)
+            return
+        load_data(directory, compact=True)
+        try:
+            save_snapshot(path, sources, graph, people, movies, names, name_index)
+        except OSError as e:
+            print(f"Could not write snapshot {path}: {e}", file=sys.stderr)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
             people[row["id"]] = {
                 "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
+                "birth": row["birth"]
             }
+            if not compact:
+                people[row["id"]]["movies"] = set()
             if row["name"].lower() not in names:
                 names[row["name"].lower()] = {row["id"]}
             else:
@@ -37,9 +114,15 @@ def load_data(directory):
         for row in reader:
             movies[row["id"]] = {
                 "title": row["title"],
-                "year": row["year"],
-                "stars": set()
+                "year": row["year"]
             }
+            if not compact:
+                movies[row["id"]]["stars"] = set()
+
+    if compact:
+        graph = load_compact_stars(directory)
+        name_index = NameIndex.build(names, _movie_count)
+        return
 
     # Load stars
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
@@ -51,25 +134,355 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    name_index = NameIndex.build(names, _movie_count)
+
+
+def _movie_count(person_id):
+    """
+    Returns how many movies a person starred in, used to rank people
+    sharing a name or a prefix.
+    """
+    if graph is not None:
+        return graph.credits(graph.person_index[person_id])
+    return len(people[person_id]["movies"])
+
+
+def enable_costars(maxsize=None):
+    """
+    Expand people during searches from a co-star projection of the
+    loaded data instead of rebuilding (movie, person) pairs each time.
+
+    With no `maxsize` every person's co-stars are computed now;
+    otherwise they are computed on first use and at most `maxsize`
+    people are kept.
+    """
+    global costars
+    if graph is not None:
+        costars = CoStars(graph.neighbors, maxsize)
+        persons = range(len(graph.person_ids))
+    else:
+        costars = CoStars(neighbors_for_person, maxsize)
+        persons = people
+    if maxsize is None:
+        costars.build(persons)
+
+
+def enable_cache(maxsize=4096, trees=8, path=None):
+    """
+    Cache shortest_path answers for up to `maxsize` pairs of people,
+    and the search trees of the last `trees` breadth-first searches.
+    With a `path`, answers are also kept on disk in a dbm file tied to
+    the loaded data.
+    """
+    global path_cache
+    if path_cache is not None:
+        path_cache.close()
+    path_cache = PathCache(maxsize, trees, path, data_fingerprint)
+
+
+def build_landmarks(count=LANDMARKS):
+    """
+    Precompute distances from the `count` best-connected people, for
+    distance_bounds and the "alt" strategy. Uses the compact graph,
+    building one from the loaded data if needed.
+    """
+    global landmarks
+    landmarks = Landmarks.build(compact_graph(), count)
+
+
+def compact_graph():
+    """
+    Returns the loaded CompactGraph, or one built once from the
+    loaded dictionaries.
+    """
+    global _derived_graph
+    if graph is not None:
+        return graph
+    if _derived_graph is None:
+        _derived_graph = CompactGraph.from_data(people, movies)
+    return _derived_graph
+
+
+def all_distances(source):
+    """
+    Returns (graph, distance) where `distance` holds every person's
+    degrees of separation from the `source` person_id, indexed like
+    graph.person_ids, with -1 for people not connected to them.
+    """
+    full_graph = compact_graph()
+    return full_graph, full_graph.distances(full_graph.person_index[source])
+
+
+def distance_report(source, distance):
+    """
+    Summarises an all_distances result: how many people are connected
+    to the source and how many are at each degree of separation.
+    """
+    histogram = Counter(distance)
+    unconnected = histogram.pop(-1, 0)
+    return {
+        "source": source,
+        "people": len(distance),
+        "connected": len(distance) - unconnected,
+        "unconnected": unconnected,
+        "histogram": {degree: histogram[degree] for degree in sorted(histogram)}
+    }
+
+
+def distance_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two person_ids from the landmarks, without searching. Either bound
+    may be math.inf.
+    """
+    if landmarks is None:
+        raise RuntimeError("call build_landmarks() first")
+    index = landmarks.graph.person_index
+    return landmarks.bounds(index[source], index[target])
+
+
+def load_compact_stars(directory):
+    """
+    Load stars.csv into a CompactGraph over the loaded people and movies.
+    """
+    person_ids = list(people)
+    movie_ids = list(movies)
+    person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+    movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+    edge_people = array("i")
+    edge_movies = array("i")
+    seen = set()
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                person = person_index[row["person_id"]]
+                movie = movie_index[row["movie_id"]]
+            except KeyError:
+                continue
+            if (person, movie) not in seen:
+                seen.add((person, movie))
+                edge_people.append(person)
+                edge_movies.append(movie)
+    return CompactGraph.from_edges(person_ids, movie_ids, edge_people, edge_movies,
+                                   person_index, movie_index)
+
+
+def apply_updates(people_rows=(), movies_rows=(), stars_rows=()):
+    """
+    Adds rows shaped like those of people.csv, movies.csv and stars.csv
+    to the loaded data in place.
+
+    Landmark distances are brought up to date, and only the cached
+    co-stars, search trees and paths that the new credits could change
+    are dropped. New people are ranked last among namesakes until the
+    data is next loaded. Returns counts of what was added and dropped.
+    """
+    compact_graphs = [g for g in (graph, _derived_graph) if g is not None]
+    summary = {"people": 0, "movies": 0, "stars": 0, "trees_dropped": 0, "paths_dropped": 0}
+
+    for row in people_rows:
+        person_id = row["id"]
+        if person_id in people:
+            continue
+        people[person_id] = {"name": row["name"], "birth": row["birth"]}
+        if graph is None:
+            people[person_id]["movies"] = set()
+        names.setdefault(row["name"].lower(), set()).add(person_id)
+        name_index.add(row["name"], person_id, 0)
+        for g in compact_graphs:
+            g.add_person(person_id)
+        summary["people"] += 1
+
+    for row in movies_rows:
+        movie_id = row["id"]
+        if movie_id in movies:
+            continue
+        movies[movie_id] = {"title": row["title"], "year": row["year"]}
+        if graph is None:
+            movies[movie_id]["stars"] = set()
+        for g in compact_graphs:
+            g.add_movie(movie_id)
+        summary["movies"] += 1
+
+    # Pairs of people who are now co-stars, and everyone whose co-stars changed
+    edges = []
+    touched = set()
+    touched_movies = set()
+    for row in stars_rows:
+        person_id = row["person_id"]
+        movie_id = row["movie_id"]
+        if person_id not in people or movie_id not in movies:
+            continue
+        if graph is None:
+            if movie_id in people[person_id]["movies"]:
+                continue
+            others = set(movies[movie_id]["stars"])
+            people[person_id]["movies"].add(movie_id)
+            movies[movie_id]["stars"].add(person_id)
+        else:
+            movie = graph.movie_index[movie_id]
+            others = {graph.person_ids[star] for star in graph.people_for_movie(movie)}
+            if not graph.add_star(graph.person_index[person_id], movie):
+                continue
+        if _derived_graph is not None:
+            _derived_graph.add_star(_derived_graph.person_index[person_id],
+                                    _derived_graph.movie_index[movie_id])
+        edges.extend((person_id, other) for other in others)
+        touched.add(person_id)
+        touched.update(others)
+        touched_movies.add(movie_id)
+        summary["stars"] += 1
+
+    if costars is not None:
+        for person_id in touched:
+            costars.discard(graph.person_index[person_id] if graph is not None else person_id)
+    if landmarks is not None:
+        movie_index = landmarks.graph.movie_index
+        landmarks.update([movie_index[movie_id] for movie_id in touched_movies])
+    if path_cache is not None and edges:
+        if graph is not None:
+            edges = [(graph.person_index[a], graph.person_index[b]) for a, b in edges]
+        trees, paths = path_cache.invalidate(edges, _still_shortest)
+        summary["trees_dropped"] = trees
+        summary["paths_dropped"] = paths
+    return summary
+
+
+def _still_shortest(source, target, path):
+    """
+    Returns whether a cached path is known to still be shortest after
+    new credits: a single step can never be shortened, and otherwise
+    the landmarks must prove that nothing shorter exists.
+    """
+    if len(path) <= 1:
+        return True
+    if landmarks is None:
+        return False
+    lower, _ = distance_bounds(source, target)
+    return lower >= len(path)
+
+
+def refresh_data(directory):
+    """
+    Applies the rows appended to the CSV files in `directory` since
+    they were loaded, with apply_updates, and returns its summary.
+    """
+    global data_fingerprint
+    current = fingerprint(directory)
+    rows = {}
+    for filename, (size, _) in data_fingerprint.items():
+        rows[filename] = _appended_rows(os.path.join(directory, filename), size, current[filename][0])
+    summary = apply_updates(rows["people.csv"], rows["movies.csv"], rows["stars.csv"])
+    data_fingerprint = current
+    if path_cache is not None:
+        path_cache.stamp(current)
+    return summary
+
+
+def _appended_rows(path, start, end):
+    """
+    Parses the CSV rows between byte offsets `start` and `end` of a file,
+    using the file's header row for field names.
+    """
+    if end < start:
+        raise ValueError(f"{path} is smaller than when it was loaded; load it again")
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8")]))
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    return list(csv.DictReader(io.StringIO(text, newline=""), fieldnames=header))
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(description="Find degrees of separation between two people.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="bfs",
+                        help="search from the source only, or from both ends")
+    parser.add_argument("--compact", action="store_true",
+                        help="keep the graph in integer-indexed arrays")
+    parser.add_argument("--snapshot", nargs="?", const=True, metavar="PATH",
+                        help=f"load from (or write) a snapshot, by default {SNAPSHOT} in the directory")
+    parser.add_argument("--landmarks", type=int, metavar="COUNT",
+                        help=f"precompute landmark distances (default {LANDMARKS} with --strategy alt)")
+    parser.add_argument("--costars", nargs="?", type=int, const=0, metavar="MAXSIZE",
+                        help="expand searches from a co-star projection, precomputed or an LRU of MAXSIZE people")
+    parser.add_argument("--cache", nargs="?", const=True, metavar="PATH",
+                        help="cache answers in memory, and on disk at PATH if given")
+    parser.add_argument("--distances", metavar="PERSON",
+                        help="report everyone's degrees of separation from PERSON (id or name)")
+    parser.add_argument("--output", metavar="FILE",
+                        help="with --distances, write person_id,degrees for everyone to FILE")
+    parser.add_argument("--batch", nargs="?", const="-", metavar="FILE",
+                        help="answer tab-separated source/target pairs from FILE (or stdin) as JSON lines")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="processes for --batch")
+    parser.add_argument("--stats", nargs="?", const="-", metavar="FILE",
+                        help="write search statistics as JSON to FILE (or stderr); per query with --batch")
+    args = parser.parse_args()
+    directory = args.directory
+    stats = SearchStats()
 
-    # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    # Load data from files into memory, keeping stdout clean for structured output
+    status = sys.stderr if args.batch or args.distances else sys.stdout
+    print("Loading data...", file=status)
+    with stats.phase("load"):
+        load_data(directory, compact=args.compact, snapshot=args.snapshot)
+        if args.costars is not None:
+            enable_costars(args.costars or None)
+        if args.landmarks or args.strategy == "alt":
+            build_landmarks(args.landmarks or LANDMARKS)
+        if args.cache:
+            enable_cache(path=None if args.cache is True else args.cache)
+    print("Data loaded.", file=status)
 
-    source = person_id_for_name(input("Name: "))
+    if args.distances:
+        source, error = _resolve_person(args.distances)
+        if error:
+            sys.exit(error)
+        full_graph, distance = all_distances(source)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["person_id", "degrees"])
+                for person_id, degrees in zip(full_graph.person_ids, distance):
+                    writer.writerow([person_id, degrees if degrees >= 0 else ""])
+        print(json.dumps(distance_report(source, distance)))
+        return
+
+    if args.batch:
+        if args.stats:
+            _write_stats(stats, args.stats)
+        if args.batch == "-":
+            run_batch(sys.stdin, sys.stdout, args.strategy, args.workers, bool(args.stats))
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                run_batch(f, sys.stdout, args.strategy, args.workers, bool(args.stats))
+        return
+
+    name = input("Name: ")
+    with stats.phase("resolve"):
+        source = person_id_for_name(name)
     if source is None:
         sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+    name = input("Name: ")
+    with stats.phase("resolve"):
+        target = person_id_for_name(name)
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if landmarks is not None:
+        lower, upper = distance_bounds(source, target)
+        if lower == math.inf:
+            print("Landmarks show these people are not connected.")
+        elif upper == math.inf:
+            print(f"At least {lower} degrees of separation.")
+        else:
+            print(f"Between {lower} and {upper} degrees of separation.")
+
+    path = shortest_path(source, target, strategy=args.strategy, stats=stats)
+    if args.stats:
+        _write_stats(stats, args.stats)
 
     if path is None:
         print("Not connected.")
@@ -84,20 +497,232 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def _write_stats(stats, destination):
+    """
+    Writes `stats` as a line of JSON to a file, or to stderr for "-".
+    """
+    if destination == "-":
+        print(stats.to_json(), file=sys.stderr)
+    else:
+        with open(destination, "a", encoding="utf-8") as f:
+            f.write(stats.to_json() + "\n")
+
+
+def run_batch(lines, output, strategy="bfs", workers=None, with_stats=False):
+    """
+    Answers one query per line of `lines`, each a source and target
+    (person id or name) separated by a tab, writing one JSON object per
+    query to `output` in input order. `with_stats` adds each query's
+    SearchStats to its object.
+
+    Queries are spread over `workers` forked processes, which inherit
+    the already loaded data instead of loading it again. Workers only
+    read an on-disk path cache; this process writes their new answers
+    once they have finished.
+    """
+    queries = (
+        (line.rstrip("\n").split("\t"), strategy, with_stats)
+        for line in lines
+        if line.strip() and not line.startswith("#")
+    )
+    if workers is not None and workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        on_disk = path_cache is not None and path_cache.path is not None
+        if on_disk:
+            # Flush and close the file so workers do not inherit a handle
+            path_cache.close()
+        answers = []
+        try:
+            with multiprocessing.get_context("fork").Pool(workers, initializer=_start_batch_worker) as pool:
+                for result, found in pool.imap(_worker_batch_query, queries, chunksize=16):
+                    output.write(json.dumps(result) + "\n")
+                    output.flush()
+                    answers.extend(found)
+        finally:
+            if on_disk:
+                path_cache.reopen()
+                for source, target, path in answers:
+                    path_cache.put(source, target, path)
+    else:
+        for query in queries:
+            output.write(json.dumps(batch_query(query)) + "\n")
+            output.flush()
+
+
+def _start_batch_worker():
+    if path_cache is not None and path_cache.path is not None:
+        path_cache.open_read_only()
+
+
+def _worker_batch_query(query):
+    """
+    batch_query in a worker process, also returning the answers it
+    added to the path cache.
+    """
+    result = batch_query(query)
+    return result, path_cache.take_pending() if path_cache is not None else []
+
+
+def batch_query(query):
+    """
+    Answers a single ([source, target], strategy, with_stats) batch query.
+    """
+    fields, strategy, with_stats = query
+    if len(fields) != 2:
+        return {"query": fields, "error": "expected a source and a target separated by a tab"}
+    result = {"source": fields[0], "target": fields[1]}
+    stats = SearchStats() if with_stats else None
+    person_ids = []
+    for field in fields:
+        person_id, error = _resolve_person(field, stats)
+        if error:
+            result["error"] = error
+            return result
+        person_ids.append(person_id)
+    path = shortest_path(person_ids[0], person_ids[1], strategy=strategy, stats=stats)
+    result["source_id"], result["target_id"] = person_ids
+    result["degrees"] = len(path) if path is not None else None
+    result["path"] = path
+    if stats is not None:
+        result["stats"] = stats.to_dict()
+    return result
+
+
+def _resolve_person(text, stats=None):
+    """
+    Returns (person_id, error) for a person id or unambiguous name.
+    """
+    if stats is not None:
+        with stats.phase("resolve"):
+            return _resolve_person(text)
+    text = text.strip()
+    if text in people:
+        return text, None
+    name, birth = _split_birth(text)
+    person_ids = person_ids_for_name(name, birth)
+    if len(person_ids) == 1:
+        return person_ids[0], None
+    elif person_ids:
+        return None, f"ambiguous name: {text} ({', '.join(person_ids)})"
+    return None, f"person not found: {text}"
+
+
+def _split_birth(text):
+    """
+    Splits "Name (YEAR)" into ("Name", "YEAR"); other text has no birth year.
+    """
+    if text.endswith(")") and " (" in text:
+        name, birth = text[:-1].rsplit(" (", 1)
+        if birth.isdigit():
+            return name, birth
+    return text, None
+
+
+def shortest_path(source, target, strategy="bfs", stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    `strategy` is "bfs" to search outwards from the source only,
+    "bidirectional" to search from both ends and meet in the middle, or
+    "alt" for A* guided by the landmarks from build_landmarks.
+    A SearchStats passed as `stats` is filled in with the cost of the
+    search, timed as its "search" phase.
+
     If no possible path, returns None.
     """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"unknown strategy: {strategy}")
+    if stats is None:
+        return _shortest_path(source, target, strategy, None)
+    stats.strategy = strategy
+    with stats.phase("search"):
+        return _shortest_path(source, target, strategy, stats)
+
+
+def _shortest_path(source, target, strategy, stats):
+    if source == target:
+        return []
+    if path_cache is not None:
+        found, path = path_cache.get(source, target)
+        if found:
+            if stats is not None:
+                stats.cached = "pair"
+            return path
+
+    if strategy == "alt":
+        path = landmark_search(source, target, stats)
+    elif graph is None:
+        neighbors = costars if costars is not None else neighbors_for_person
+        path = _tree_search(source, target, strategy, neighbors, stats)
+    else:
+        # Search over person indices and translate the answer back to ids
+        neighbors = costars if costars is not None else graph.neighbors
+        path = _tree_search(graph.person_index[source], graph.person_index[target],
+                            strategy, neighbors, stats)
+        path = graph.to_ids(path) if path is not None else None
+
+    if path_cache is not None:
+        path_cache.put(source, target, path)
+    return path
+
 
+def _counted(neighbors, stats):
+    """
+    Wraps a neighbor function so that `stats` counts the pairs it builds.
+    A CoStars projection only counts the pairs built on a cache miss.
+    """
+    if stats is None:
+        return neighbors
+    if isinstance(neighbors, CoStars):
+        def counted(state):
+            built = neighbors.built
+            pairs = neighbors(state)
+            stats.neighbor_pairs += neighbors.built - built
+            return pairs
+    else:
+        def counted(state):
+            pairs = list(neighbors(state))
+            stats.neighbor_pairs += len(pairs)
+            return pairs
+    return counted
+
+
+def _tree_search(source, target, strategy, neighbors, stats=None):
+    """
+    Runs a breadth-first strategy, answering from and adding to the
+    search trees kept by the path cache when it is enabled.
+    """
+    search = bidirectional_search if strategy == "bidirectional" else breadth_first_search
+    neighbors = _counted(neighbors, stats)
+    if path_cache is None:
+        return search(source, target, neighbors, stats=stats)
+
+    found, path = path_cache.tree_path(source, target)
+    if found:
+        if stats is not None:
+            stats.cached = "tree"
+        return path
+    tree = {}
+    path = search(source, target, neighbors, tree, stats)
+    # Breadth-first search only gives up once it has reached everyone
+    path_cache.add_tree(source, tree, complete=path is None and search is breadth_first_search)
+    return path
+
+
+def breadth_first_search(source, target, neighbors, tree=None, stats=None):
+    """
+    Breadth-first search outwards from the source, where
+    `neighbors(state)` gives the (action, state) pairs to expand.
+    Each state reached is recorded in `tree`, if given, as its
+    (parent state, action) pair, and the work done in `stats`.
+    """
     num_explored = 0                                    # Track number of states explored
     start = Node(state=source,parent=None,action=None)  # Create a node for the starting state
-    frontier = QueueFrontier()                          # Queue frontier is used for breadth-first search
+    frontier = IndexedQueueFrontier()                   # Queue frontier is used for breadth-first search
     frontier.add(start)                                 # Add the first node to the frontier
     explored = set()                                    # Initialize an empty set to track explored nodes
-
+    if tree is not None:
+        tree[source] = None
 
     while True:
         # If there is nothing left in the frontier their is no solution
@@ -108,11 +733,16 @@ def shortest_path(source, target):
         node=frontier.remove()
         num_explored+=1
         explored.add(node.state)
+        if stats is not None:
+            stats.expanded = num_explored
+            stats.frontier(len(frontier) + 1)
 
         # Get the actions available in this state ie people who starred in the same movie
-        for movie_id, person_id in neighbors_for_person(node.state):
+        for movie_id, person_id in neighbors(node.state):
             if not frontier.contains_state(person_id) and person_id not in explored:
                 child = Node(state=person_id,parent=node,action=movie_id)
+                if tree is not None:
+                    tree[person_id] = (node.state, movie_id)
                 if child.state==target:     # If the new node is a goal state, return answer immediatly
                     actions = []
                     while child.parent is not None:
@@ -123,12 +753,191 @@ def shortest_path(source, target):
                 frontier.add(child)         # Else add it to the frontier
 
 
+def landmark_search(source, target, stats=None):
+    """
+    A* search guided by landmark distance bounds. Answers straight
+    from the landmarks when their bounds already meet.
+    """
+    if landmarks is None:
+        raise RuntimeError("call build_landmarks() first")
+    landmark_graph = landmarks.graph
+    source = landmark_graph.person_index[source]
+    target = landmark_graph.person_index[target]
+
+    lower, upper = landmarks.bounds(source, target)
+    if lower == math.inf:
+        return None
+    if lower == upper:
+        if stats is not None:
+            stats.cached = "landmarks"
+        return landmark_graph.to_ids(landmarks.path_via(source, target))
+
+    if costars is not None and landmark_graph is graph:
+        neighbors = costars
+    else:
+        neighbors = landmark_graph.neighbors
+    heuristic = landmarks.heuristic(target, source, ACTIVE_LANDMARKS)
+    path = a_star_search(source, target, _counted(neighbors, stats), heuristic, upper, stats)
+    return landmark_graph.to_ids(path) if path is not None else None
+
+
+def a_star_search(source, target, neighbors, heuristic, limit=math.inf, stats=None):
+    """
+    A* search with unit step costs. `heuristic(state)` must never
+    overestimate the distance from a state to the target. States whose
+    estimated total exceeds `limit`, a known upper bound, are skipped.
+    The work done is recorded in `stats`, if given.
+    """
+    cost = {source: 0}
+    estimate = {source: heuristic(source)}
+    # Order by estimated total, preferring deeper nodes on ties
+    frontier = PriorityFrontier(lambda node: (estimate[node.state], -cost[node.state]))
+    frontier.add(Node(state=source, parent=None, action=None))
+    explored = set()
+
+    while not frontier.empty():
+        node = frontier.remove()
+        if node.state in explored:
+            continue
+        if node.state == target:
+            return _actions(node)
+        explored.add(node.state)
+        if stats is not None:
+            stats.expanded += 1
+            stats.frontier(len(frontier) + 1)
+
+        # Totals only grow from here on, so reaching the target at the
+        # popped estimate is already optimal
+        bound = estimate[node.state]
+        step_cost = cost[node.state] + 1
+        for action, state in neighbors(node.state):
+            if state in explored or step_cost >= cost.get(state, math.inf):
+                continue
+            child = Node(state=state, parent=node, action=action)
+            if state == target and step_cost <= bound:
+                return _actions(child)
+            total = step_cost + heuristic(state)
+            if total > limit:
+                continue
+            cost[state] = step_cost
+            estimate[state] = total
+            frontier.add(child)
+    return None
+
+
+def _actions(node):
+    """
+    Returns the (action, state) pairs leading to `node`.
+    """
+    actions = []
+    while node.parent is not None:
+        actions.append((node.action, node.state))
+        node = node.parent
+    actions.reverse()
+    return actions
+
+
+def bidirectional_search(source, target, neighbors, tree=None, stats=None):
+    """
+    Breadth-first search from both the source and the target, one
+    whole level at a time, always growing the smaller side. The first
+    person reached from both sides lies on a shortest path.
+    The side grown from the source is recorded in `tree`, if given,
+    and the work done in `stats`.
+    """
+    # Map each reached person to the (person, movie_id) step back towards its root
+    forward = tree if tree is not None else {}
+    forward[source] = None
+    backward = {target: None}
+    forward_level = [source]
+    backward_level = [target]
+
+    while forward_level and backward_level:
+        if stats is not None:
+            stats.frontier(len(forward_level) + len(backward_level))
+        if len(forward_level) <= len(backward_level):
+            forward_level, meet = _expand_level(forward_level, forward, backward, neighbors, stats)
+        else:
+            backward_level, meet = _expand_level(backward_level, backward, forward, neighbors, stats)
+        if meet is not None:
+            return _join_paths(meet, forward, backward)
+    return None
+
+
+def _expand_level(level, reached, other, neighbors, stats=None):
+    """
+    Expands every person in `level`, recording parents in `reached`.
+    Returns the next level and the first person also in `other`, if any.
+    """
+    next_level = []
+    for person in level:
+        if stats is not None:
+            stats.expanded += 1
+        for movie_id, person_id in neighbors(person):
+            if person_id in reached:
+                continue
+            reached[person_id] = (person, movie_id)
+            if person_id in other:
+                return next_level, person_id
+            next_level.append(person_id)
+    return next_level, None
+
+
+def _join_paths(meet, forward, backward):
+    """
+    Builds the (movie_id, person_id) path through the meeting person.
+    """
+    path = []
+    person = meet
+    while forward[person] is not None:
+        parent, movie_id = forward[person]
+        path.append((movie_id, person))
+        person = parent
+    path.reverse()
+    person = meet
+    while backward[person] is not None:
+        parent, movie_id = backward[person]
+        path.append((movie_id, parent))
+        person = parent
+    return path
+
+
+def person_ids_for_name(name, birth=None):
+    """
+    Returns the IMDB ids of everyone with this name (and birth year,
+    if given), most movies first, without asking the user anything.
+    """
+    if name_index is not None:
+        person_ids = name_index.exact(name)
+    else:
+        person_ids = sorted(names.get(name.lower(), set()))
+    if birth is not None:
+        person_ids = [person_id for person_id in person_ids if people[person_id]["birth"] == birth]
+    return person_ids
+
+
+def search_names(prefix, limit=10):
+    """
+    Returns up to `limit` IMDB ids of people whose names start with
+    `prefix`, most movies first.
+    """
+    return name_index.prefix(prefix, limit)
+
+
+def suggest_names(text, limit=10):
+    """
+    Returns up to `limit` IMDB ids of people whose names are close
+    to `text`, for example misspelt, closest first.
+    """
+    return name_index.fuzzy(text, limit)
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name)
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
@@ -154,6 +963,12 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return set(
+            (graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in graph.neighbors(graph.person_index[person_id])
+        )
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -0,0 +1,281 @@
+from array import array
+from collections import OrderedDict
+
+
+class CompactGraph():
+    """
+    Integer-indexed, array-backed form of the people/movies data.
+
+    People and movies are numbered densely from 0. The movies of person
+    `p` are `person_movies[person_offsets[p]:person_offsets[p + 1]]` and
+    the stars of movie `m` are `movie_people[movie_offsets[m]:movie_offsets[m + 1]]`
+    (compressed sparse row adjacency in both directions).
+
+    People, movies and credits added after the arrays were built are
+    kept in small overlay dictionaries alongside them.
+    """
+
+    def __init__(self, person_ids, movie_ids, person_offsets, person_movies,
+                 movie_offsets, movie_people, person_index=None, movie_index=None):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_index = person_index or _index(person_ids)
+        self.movie_index = movie_index or _index(movie_ids)
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        self.array_people = len(person_offsets) - 1
+        self.array_movies = len(movie_offsets) - 1
+        self.added_movies = {}
+        self.added_people = {}
+
+    @classmethod
+    def from_edges(cls, person_ids, movie_ids, edge_people, edge_movies,
+                   person_index=None, movie_index=None):
+        """
+        Build a graph from parallel sequences of person and movie
+        indices, one entry per (person, movie) credit.
+        """
+        person_offsets, person_movies = _csr(len(person_ids), edge_people, edge_movies)
+        movie_offsets, movie_people = _csr(len(movie_ids), edge_movies, edge_people)
+        return cls(person_ids, movie_ids, person_offsets, person_movies,
+                   movie_offsets, movie_people, person_index, movie_index)
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Build a graph from the `people` and `movies` dictionaries
+        filled in by `degrees.load_data`.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        movie_index = _index(movie_ids)
+        edge_people = array("i")
+        edge_movies = array("i")
+        for i, person_id in enumerate(person_ids):
+            for movie_id in people[person_id]["movies"]:
+                edge_people.append(i)
+                edge_movies.append(movie_index[movie_id])
+        return cls.from_edges(person_ids, movie_ids, edge_people, edge_movies,
+                              movie_index=movie_index)
+
+    def movies_for_person(self, person):
+        if person < self.array_people:
+            movies = self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+        else:
+            movies = ()
+        added = self.added_movies.get(person)
+        return movies if added is None else list(movies) + added
+
+    def people_for_movie(self, movie):
+        if movie < self.array_movies:
+            stars = self.movie_people[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+        else:
+            stars = ()
+        added = self.added_people.get(movie)
+        return stars if added is None else list(stars) + added
+
+    def credits(self, person):
+        return len(self.movies_for_person(person))
+
+    def add_person(self, person_id):
+        """
+        Adds a person with no movies yet and returns their index.
+        """
+        self.person_index[person_id] = len(self.person_ids)
+        self.person_ids.append(person_id)
+        return self.person_index[person_id]
+
+    def add_movie(self, movie_id):
+        """
+        Adds a movie with no stars yet and returns its index.
+        """
+        self.movie_index[movie_id] = len(self.movie_ids)
+        self.movie_ids.append(movie_id)
+        return self.movie_index[movie_id]
+
+    def add_star(self, person, movie):
+        """
+        Records that `person` starred in `movie`. Returns False if
+        that was already known.
+        """
+        if movie in self.movies_for_person(person):
+            return False
+        self.added_movies.setdefault(person, []).append(movie)
+        self.added_people.setdefault(movie, []).append(person)
+        return True
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for everyone who starred
+        in a movie with `person`, including `person` themself.
+        """
+        if self.added_people:
+            for movie in self.movies_for_person(person):
+                for star in self.people_for_movie(movie):
+                    yield movie, star
+            return
+
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        for movie in self.movies_for_person(person):
+            for star in movie_people[movie_offsets[movie]:movie_offsets[movie + 1]]:
+                yield movie, star
+
+    def distances(self, source):
+        """
+        Returns an array of every person's degrees of separation from
+        `source`, with -1 for people who are not connected to them.
+
+        Searches one whole level at a time, as vectorised NumPy
+        operations over the level when NumPy is installed and there
+        are no added credits.
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            return self._distances(source)
+        if self.added_people or len(self.person_ids) != self.array_people:
+            return self._distances(source)
+        distance = array("i")
+        distance.frombytes(_level_search(np, self, source).tobytes())
+        return distance
+
+    def _distances(self, source):
+        distance = array("i", [-1]) * len(self.person_ids)
+        movie_seen = bytearray(len(self.movie_ids))
+        distance[source] = 0
+        level = [source]
+        depth = 0
+        while level:
+            depth += 1
+            next_level = []
+            for person in level:
+                for movie in self.movies_for_person(person):
+                    if movie_seen[movie]:
+                        continue
+                    movie_seen[movie] = 1
+                    for star in self.people_for_movie(movie):
+                        if distance[star] < 0:
+                            distance[star] = depth
+                            next_level.append(star)
+            level = next_level
+        return distance
+
+    def to_ids(self, path):
+        """
+        Translates a path of (movie, person) indices into
+        (movie_id, person_id) pairs.
+        """
+        return [(self.movie_ids[movie], self.person_ids[person]) for movie, person in path]
+
+
+class CoStars():
+    """
+    Co-star projection of a people/movies graph: for each person, the
+    distinct other people they starred with, each paired with one movie
+    they share. Calling the projection with a person returns a tuple of
+    (movie, person) pairs, so it can stand in for a neighbors function.
+
+    `neighbors` gives the raw (movie, person) pairs for a person. With a
+    `maxsize`, at most that many people are kept, least recently used
+    first out; otherwise every person expanded is kept.
+    """
+
+    def __init__(self, neighbors, maxsize=None):
+        self.neighbors = neighbors
+        self.maxsize = maxsize
+        self.cache = OrderedDict() if maxsize else {}
+        # Number of (movie, person) pairs built so far
+        self.built = 0
+
+    def __call__(self, person):
+        pairs = self.cache.get(person)
+        if pairs is not None:
+            if self.maxsize:
+                self.cache.move_to_end(person)
+            return pairs
+
+        first_movie = {}
+        for movie, star in self.neighbors(person):
+            if star != person and star not in first_movie:
+                first_movie[star] = movie
+        pairs = tuple((movie, star) for star, movie in first_movie.items())
+        self.built += len(pairs)
+
+        self.cache[person] = pairs
+        if self.maxsize and len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        return pairs
+
+    def build(self, persons):
+        """
+        Precompute the co-stars of every person in `persons`.
+        """
+        for person in persons:
+            self(person)
+
+    def discard(self, person):
+        self.cache.pop(person, None)
+
+
+def _level_search(np, graph, source):
+    """
+    NumPy level-synchronous breadth-first search over a CompactGraph.
+    """
+    person_offsets = np.frombuffer(graph.person_offsets, dtype=np.int32)
+    person_movies = np.frombuffer(graph.person_movies, dtype=np.int32)
+    movie_offsets = np.frombuffer(graph.movie_offsets, dtype=np.int32)
+    movie_people = np.frombuffer(graph.movie_people, dtype=np.int32)
+
+    distance = np.full(len(graph.person_ids), -1, dtype=np.int32)
+    movie_seen = np.zeros(len(graph.movie_ids), dtype=bool)
+    distance[source] = 0
+    level = np.array([source], dtype=np.int32)
+    depth = 0
+    while level.size:
+        depth += 1
+        level_movies = np.unique(_gather(np, person_offsets, person_movies, level))
+        level_movies = level_movies[~movie_seen[level_movies]]
+        movie_seen[level_movies] = True
+        stars = _gather(np, movie_offsets, movie_people, level_movies)
+        level = np.unique(stars[distance[stars] < 0])
+        distance[level] = depth
+    return distance
+
+
+def _gather(np, offsets, columns, rows):
+    """
+    Concatenates the CSR rows `rows` without a Python loop.
+    """
+    starts = offsets[rows]
+    counts = offsets[rows + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return columns[:0]
+    # Index of each output element = its row start + its position in the row
+    row_ends = np.cumsum(counts)
+    positions = np.arange(total) - np.repeat(row_ends - counts, counts)
+    return columns[np.repeat(starts, counts) + positions]
+
+
+def _index(ids):
+    return {item: i for i, item in enumerate(ids)}
+
+
+def _csr(rows, edge_rows, edge_columns):
+    """
+    Counting sort of edges by row. Returns (offsets, columns) arrays.
+    """
+    offsets = array("i", bytes(4 * (rows + 1)))
+    for row in edge_rows:
+        offsets[row + 1] += 1
+    for row in range(rows):
+        offsets[row + 1] += offsets[row]
+    columns = array("i", bytes(4 * len(edge_columns)))
+    position = offsets[:-1]
+    for row, column in zip(edge_rows, edge_columns):
+        columns[position[row]] = column
+        position[row] += 1
+    return offsets, columns
@@ -0,0 +1,154 @@
+import heapq
+import math
+
+
+class Landmarks():
+    """
+    Distances from a few well-connected landmark people to everyone
+    else in a CompactGraph, used to bound degrees of separation
+    (d(s, t) >= |d(L, s) - d(L, t)| and d(s, t) <= d(L, s) + d(L, t))
+    and as an admissible A* heuristic.
+    """
+
+    def __init__(self, graph, people, distances):
+        self.graph = graph
+        self.people = people
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, count):
+        """
+        Pick the `count` people with the most co-star credits as
+        landmarks and run a breadth-first search from each of them.
+        """
+        credits = []
+        for person in range(len(graph.person_ids)):
+            credits.append(sum(
+                len(graph.people_for_movie(movie)) - 1
+                for movie in graph.movies_for_person(person)
+            ))
+        people = heapq.nlargest(count, range(len(credits)), key=credits.__getitem__)
+        return cls(graph, people, [graph.distances(person) for person in people])
+
+    def update(self, movies):
+        """
+        Brings the distances up to date after people, movies, or credits
+        in `movies` were added to the graph. Distances can only shrink,
+        so only people that the new credits bring closer are revisited.
+        """
+        graph = self.graph
+        for distance in self.distances:
+            distance.extend([-1] * (len(graph.person_ids) - len(distance)))
+
+            # Each touched movie puts all its stars within one degree of
+            # its closest star
+            queue = []
+            for movie in movies:
+                stars = graph.people_for_movie(movie)
+                reached = [distance[star] for star in stars if distance[star] >= 0]
+                if not reached:
+                    continue
+                depth = min(reached) + 1
+                for star in stars:
+                    if distance[star] < 0 or distance[star] > depth:
+                        distance[star] = depth
+                        heapq.heappush(queue, (depth, star))
+
+            while queue:
+                depth, person = heapq.heappop(queue)
+                if depth != distance[person]:
+                    continue
+                for movie in graph.movies_for_person(person):
+                    for star in graph.people_for_movie(movie):
+                        if distance[star] < 0 or distance[star] > depth + 1:
+                            distance[star] = depth + 1
+                            heapq.heappush(queue, (depth + 1, star))
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        two people. Both are math.inf if some landmark proves they are
+        not connected; upper is math.inf if no landmark reaches both.
+        """
+        lower = 0
+        upper = math.inf
+        for distance in self.distances:
+            to_source = distance[source]
+            to_target = distance[target]
+            if to_source < 0 and to_target < 0:
+                continue
+            if to_source < 0 or to_target < 0:
+                return math.inf, math.inf
+            lower = max(lower, abs(to_source - to_target))
+            upper = min(upper, to_source + to_target)
+        return lower, upper
+
+    def heuristic(self, target, source=None, active=None):
+        """
+        Returns a function giving a lower bound on the distance from
+        a person to `target`. With a `source` and an `active` count, only
+        the landmarks giving the tightest bounds for that pair are used.
+        """
+        pairs = [
+            (distance, distance[target])
+            for distance in self.distances
+            if distance[target] >= 0
+        ]
+        if source is not None and active is not None:
+            pairs.sort(key=lambda pair: -abs(pair[0][source] - pair[1]))
+            pairs = pairs[:active]
+
+        def estimate(person):
+            best = 0
+            for distance, to_target in pairs:
+                gap = distance[person] - to_target
+                if gap > best:
+                    best = gap
+                elif -gap > best:
+                    best = -gap
+            return best
+        return estimate
+
+    def path_via(self, source, target):
+        """
+        Returns the (movie, person) path from source to target through
+        the landmark giving the smallest upper bound, or None if no
+        landmark reaches both.
+        """
+        best = None
+        for landmark, distance in zip(self.people, self.distances):
+            if distance[source] >= 0 and distance[target] >= 0:
+                length = distance[source] + distance[target]
+                if best is None or length < best[0]:
+                    best = (length, landmark, distance)
+        if best is None:
+            return None
+        _, landmark, distance = best
+
+        # Walk down the distances from the source to the landmark, then
+        # from the target to the landmark and turn that half around
+        path = self._descend(source, distance)
+        back = self._descend(target, distance)
+        people = [target] + [person for _, person in back]
+        for i in range(len(back) - 1, -1, -1):
+            path.append((back[i][0], people[i]))
+        return path
+
+    def _descend(self, person, distance):
+        """
+        Steps from `person` to a co-star one degree closer to the
+        landmark until the landmark is reached.
+        """
+        steps = []
+        graph = self.graph
+        while distance[person] > 0:
+            closer = distance[person] - 1
+            step = next(
+                (movie, star)
+                for movie in graph.movies_for_person(person)
+                for star in graph.people_for_movie(movie)
+                if distance[star] == closer
+            )
+            steps.append(step)
+            person = step[1]
+        return steps
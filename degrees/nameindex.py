@@ -0,0 +1,174 @@
+import difflib
+import heapq
+from array import array
+from bisect import bisect_left, insort
+
+
+class NameIndex():
+    """
+    Sorted index of lowercased names for prefix and fuzzy lookups.
+
+    There is one entry per person, sorted by name and then by score
+    (for example, number of movies), highest first. A segment tree over
+    the scores finds the best-scoring entries in any sorted range, so a
+    prefix lookup costs O(limit * log n) whatever the prefix matches.
+    People added later are kept in a separate sorted list.
+    """
+
+    def __init__(self, keys, person_ids, scores):
+        self.keys = keys
+        self.person_ids = person_ids
+        self.scores = scores
+        self.size = len(keys)
+
+        # tree[size + i] is entry i; each parent holds the better child
+        tree = array("i", [0]) * (2 * self.size)
+        for i in range(self.size):
+            tree[self.size + i] = i
+        for node in range(self.size - 1, 0, -1):
+            tree[node] = self._better(tree[2 * node], tree[2 * node + 1])
+        self.tree = tree
+        self.added = []
+
+    @classmethod
+    def build(cls, names, score):
+        """
+        Build an index from a dictionary of lowercased names to sets of
+        person_ids, ranking people by `score(person_id)`.
+        """
+        entries = sorted(
+            (name, -score(person_id), person_id)
+            for name, person_ids in names.items()
+            for person_id in person_ids
+        )
+        return cls(
+            [name for name, _, _ in entries],
+            [person_id for _, _, person_id in entries],
+            array("i", [-negated for _, negated, _ in entries])
+        )
+
+    def add(self, name, person_id, score):
+        """
+        Adds a person to the index.
+        """
+        insort(self.added, (name.lower(), -score, person_id))
+
+    def exact(self, name):
+        """
+        Returns the person_ids with exactly this name, best first.
+        """
+        name = name.lower()
+        start = bisect_left(self.keys, name)
+        end = start
+        while end < self.size and self.keys[end] == name:
+            end += 1
+        found = [(self.scores[i], self.person_ids[i]) for i in range(start, end)]
+        found.extend(
+            (-negated, person_id)
+            for _, negated, person_id in self._added_range(name, name + "\0")
+        )
+        return _best_first(found)
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` person_ids whose names start with
+        `prefix`, best scores first.
+        """
+        prefix = prefix.lower()
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + "\U0010ffff", start)
+        found = [(self.scores[i], self.person_ids[i]) for i in self._top(start, end, limit)]
+        found.extend(
+            (-negated, person_id)
+            for _, negated, person_id in self._added_range(prefix, prefix + "\U0010ffff")
+        )
+        return _best_first(found)[:limit]
+
+    def fuzzy(self, text, limit=10, cutoff=0.75):
+        """
+        Returns up to `limit` person_ids whose names closely match
+        `text`, closest first. Only names sharing the first letter of
+        `text` are compared, to keep the search small.
+        """
+        text = text.lower()
+        if not text:
+            return []
+        start = bisect_left(self.keys, text[0])
+        end = bisect_left(self.keys, text[0] + "\U0010ffff", start)
+        # A similarity ratio of at least `cutoff` bounds the length of a match
+        shortest = len(text) * cutoff / (2 - cutoff)
+        longest = len(text) * (2 - cutoff) / cutoff
+        names = self.keys[start:end] + [
+            name for name, _, _ in self._added_range(text[0], text[0] + "\U0010ffff")
+        ]
+        candidates = [
+            name for name in dict.fromkeys(names)
+            if shortest <= len(name) <= longest
+        ]
+        matches = difflib.get_close_matches(text, candidates, limit, cutoff)
+        return [person_id for name in matches for person_id in self.exact(name)][:limit]
+
+    def _added_range(self, low, high):
+        """
+        Returns the added entries with names in [low, high).
+        """
+        start = bisect_left(self.added, (low,))
+        end = bisect_left(self.added, (high,), start)
+        return self.added[start:end]
+
+    def _top(self, start, end, limit):
+        """
+        Yields the entries in [start, end) with the best scores, best first,
+        by repeatedly splitting ranges around their best entry.
+        """
+        heap = []
+
+        def push(low, high):
+            if low < high:
+                best = self._query(low, high)
+                heapq.heappush(heap, (-self.scores[best], best, low, high))
+
+        push(start, end)
+        while heap and limit > 0:
+            _, best, low, high = heapq.heappop(heap)
+            yield best
+            limit -= 1
+            push(low, best)
+            push(best + 1, high)
+
+    def _query(self, low, high):
+        """
+        Returns the best entry in [low, high).
+        """
+        best = -1
+        low += self.size
+        high += self.size
+        while low < high:
+            if low & 1:
+                best = self._better(best, self.tree[low])
+                low += 1
+            if high & 1:
+                high -= 1
+                best = self._better(best, self.tree[high])
+            low >>= 1
+            high >>= 1
+        return best
+
+    def _better(self, a, b):
+        if a < 0:
+            return b
+        if b < 0:
+            return a
+        # Ties go to the earlier entry, which sorts first by name
+        if self.scores[b] > self.scores[a] or (self.scores[b] == self.scores[a] and b < a):
+            return b
+        return a
+
+
+def _best_first(found):
+    """
+    Sorts (score, person_id) pairs by score, highest first, keeping
+    the order of ties, and returns the person_ids.
+    """
+    found.sort(key=lambda pair: -pair[0])
+    return [person_id for _, person_id in found]
@@ -0,0 +1,151 @@
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+
+from graph import CompactGraph
+
+MAGIC = b"DEGSNAP1"
+VERSION = 3
+
+# CompactGraph arrays stored in the snapshot, all of type "i"
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_people")
+
+# Data files a snapshot is built from
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+
+def fingerprint(directory):
+    """
+    Returns the size and modification time of each source file,
+    used to tell whether a snapshot is still current.
+    """
+    sources = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        sources[filename] = [stat.st_size, stat.st_mtime_ns]
+    return sources
+
+
+def save_snapshot(path, sources, graph, people, movies, names, name_index):
+    """
+    Write `graph`, the people, movies and names dictionaries and the
+    NameIndex over them to `path`.
+
+    Layout: MAGIC, a little-endian u64 header length, a JSON header, then
+    the raw graph arrays (8-byte aligned) and a pickle of everything else.
+    """
+    meta = pickle.dumps({
+        "person_ids": graph.person_ids,
+        "movie_ids": graph.movie_ids,
+        "people": people,
+        "movies": movies,
+        "names": names,
+        "name_index": name_index
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Section offsets are relative to the 8-byte aligned end of the header
+    blobs = [getattr(graph, name) for name in ARRAYS]
+    layout = {}
+    offset = 0
+    for name, blob in zip(ARRAYS, blobs):
+        layout[name] = [offset, len(blob)]
+        offset = _align(offset + 4 * len(blob))
+    header = json.dumps({
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "sources": sources,
+        "arrays": layout,
+        "meta": [offset, len(meta)]
+    }).encode("utf-8")
+    base = _align(len(MAGIC) + 8 + len(header))
+
+    # A process mapping the snapshot while it is being rebuilt keeps the
+    # old file; the new one only takes its name once complete
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            for name, blob in zip(ARRAYS, blobs):
+                f.write(bytes(base + layout[name][0] - f.tell()))
+                f.write(blob.tobytes())
+            f.write(bytes(base + offset - f.tell()))
+            f.write(meta)
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        raise
+
+
+def load_snapshot(path, sources):
+    """
+    Map the snapshot at `path` into memory.
+
+    Returns (graph, people, movies, names, name_index), or None if there is no
+    snapshot or it was built from source files other than `sources`.
+    The graph arrays are read-only views straight onto the mapped file,
+    so processes loading the same snapshot share those pages.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    # A truncated or corrupt snapshot is rebuilt like a stale one
+    try:
+        loaded = _read_snapshot(mapped, sources)
+    except (struct.error, ValueError, KeyError, TypeError, IndexError, UnicodeDecodeError):
+        loaded = None
+    if loaded is None:
+        mapped.close()
+    return loaded
+
+
+def _read_snapshot(mapped, sources):
+    if mapped[:len(MAGIC)] != MAGIC:
+        return None
+    start = len(MAGIC) + 8
+    length, = struct.unpack("<Q", mapped[len(MAGIC):start])
+    if start + length > len(mapped):
+        return None
+    header = json.loads(mapped[start:start + length].decode("utf-8"))
+    if (header["version"] != VERSION or header["byteorder"] != sys.byteorder
+            or header["sources"] != sources):
+        return None
+
+    base = _align(start + length)
+    sections = [(offset, 4 * count) for offset, count in header["arrays"].values()]
+    sections.append(tuple(header["meta"]))
+    if any(offset < 0 or size < 0 or base + offset + size > len(mapped) for offset, size in sections):
+        return None
+
+    # Unpickle before any view of the arrays exists, so that a failure
+    # leaves nothing holding the map open. Corrupt pickle data can fail
+    # with almost any error, even MemoryError.
+    offset, length = header["meta"]
+    try:
+        with memoryview(mapped) as view:
+            meta = pickle.loads(view[base + offset:base + offset + length])
+    except Exception:
+        return None
+
+    person_ids, movie_ids = meta["person_ids"], meta["movie_ids"]
+    loaded = meta["people"], meta["movies"], meta["names"], meta["name_index"]
+
+    view = memoryview(mapped)
+    arrays = {}
+    for name, (offset, count) in header["arrays"].items():
+        arrays[name] = view[base + offset:base + offset + 4 * count].cast("i")
+    return (CompactGraph(person_ids, movie_ids, **arrays), *loaded)
+
+
+def _align(offset):
+    return (offset + 7) & ~7
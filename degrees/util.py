@@ -1,3 +1,10 @@
+import heapq
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -36,3 +43,119 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class IndexedStackFrontier():
+    """
+    Stack frontier backed by a deque, with a count of queued nodes
+    per state so that contains_state is a hash lookup.
+    """
+    def __init__(self):
+        self.frontier = deque()
+        self.states = {}
+
+    def __len__(self):
+        return len(self.frontier)
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.pop()
+            self._discard(node.state)
+            return node
+
+    def _discard(self, state):
+        count = self.states[state] - 1
+        if count:
+            self.states[state] = count
+        else:
+            del self.states[state]
+
+
+class IndexedQueueFrontier(IndexedStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.popleft()
+            self._discard(node.state)
+            return node
+
+
+class PriorityFrontier(IndexedStackFrontier):
+    """
+    Frontier that removes the node with the lowest priority first.
+    `priority` is called with each node as it is added; ties are
+    broken in insertion order.
+    """
+    def __init__(self, priority):
+        super().__init__()
+        self.frontier = []
+        self.priority = priority
+        self.counter = 0
+
+    def add(self, node):
+        heapq.heappush(self.frontier, (self.priority(node), self.counter, node))
+        self.counter += 1
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = heapq.heappop(self.frontier)[2]
+            self._discard(node.state)
+            return node
+
+
+class SearchStats():
+    """
+    Counters and timings for one query: nodes expanded, the largest
+    frontier seen, (action, state) pairs built by neighbor functions,
+    whether a cache answered, and wall time per named phase.
+    """
+    def __init__(self):
+        self.strategy = None
+        self.expanded = 0
+        self.peak_frontier = 0
+        self.neighbor_pairs = 0
+        self.cached = None
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0) + elapsed
+
+    def frontier(self, size):
+        if size > self.peak_frontier:
+            self.peak_frontier = size
+
+    def to_dict(self):
+        return {
+            "strategy": self.strategy,
+            "expanded": self.expanded,
+            "peak_frontier": self.peak_frontier,
+            "neighbor_pairs": self.neighbor_pairs,
+            "cached": self.cached,
+            "seconds": dict(self.phases)
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
@@ -0,0 +1,51 @@
+import os
+import tempfile
+
+from pagerank import DAMPING, IncrementalPageRank, crawl, crawl_graph, iterate_pagerank, power_iteration
+
+
+def write_page(directory, page, links):
+    with open(os.path.join(directory, page), "w") as f:
+        f.write("<html><body>" + "".join(f'<a href="{link}">{link}</a>' for link in links) + "</body></html>")
+
+
+def check(incremental, directory):
+    fresh = iterate_pagerank(crawl(directory), DAMPING)
+    ranks = incremental.ranks()
+    assert ranks.keys() == fresh.keys(), (ranks, fresh)
+    for page in fresh:
+        assert abs(ranks[page] - fresh[page]) < 1e-6, (page, ranks[page], fresh[page])
+
+
+# a.html links to d.html before d.html exists; adding it must bring
+# the ranks back to those of a fresh crawl
+with tempfile.TemporaryDirectory() as directory:
+    write_page(directory, "a.html", ["d.html"])
+    write_page(directory, "b.html", ["a.html"])
+    write_page(directory, "c.html", ["b.html"])
+    incremental = IncrementalPageRank(crawl_graph(directory))
+    check(incremental, directory)
+
+    write_page(directory, "d.html", ["c.html"])
+    report = incremental.update({"d.html": {"c.html"}}, compare=True)
+    print(report)
+    check(incremental, directory)
+    _, cold = power_iteration(crawl_graph(directory), DAMPING)
+    assert report["cold_iterations"] == cold, (report, cold)
+    assert report["saved"] == cold - report["iterations"], report
+
+    # Removing b.html leaves a.html without incoming links
+    os.remove(os.path.join(directory, "b.html"))
+    report = incremental.update(removed=["b.html"])
+    print(report)
+    assert report.keys() == {"iterations"}, report
+    check(incremental, directory)
+
+# Editing one link of a bundled corpus converges faster from the old ranks
+incremental = IncrementalPageRank(crawl_graph("corpus2"))
+report = incremental.update({"c.html": {"programming.html", "python.html"}}, compare=True)
+print(report)
+assert report["iterations"] < report["cold_iterations"], report
+assert report["saved"] == report["cold_iterations"] - report["iterations"], report
+
+print(incremental.ranks())
@@ -0,0 +1,404 @@
+"""
+m,n,k-game player: tic-tac-toe on an m by n board, where the first
+to get k marks in a row, column or diagonal wins
+"""
+
+import argparse
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from tictactoe import X, O, EMPTY
+
+# Value of a won game, less one for each move it takes to win
+WIN = 1_000_000
+
+# Number of positions searched between checks of the clock
+CLOCK_INTERVAL = 256
+
+# Set up in each worker process by _start_worker: the worker's Game, and
+# [search number, best root value found so far for the player to move],
+# shared by all workers
+worker_game = None
+worker_bound = None
+
+
+class Timeout(Exception):
+    """
+    Raised inside a search when its time budget has run out.
+    """
+
+
+class Game():
+    """
+    Rules and AI for one board size and win length.
+
+    Boards are lists of m rows of n cells, as in tictactoe.py. The
+    search packs them into two integers, one bit per cell for each
+    player, with bit i * n + j standing for cell (i, j).
+    """
+
+    def __init__(self, m=3, n=3, k=3):
+        if not 1 <= k <= max(m, n):
+            raise ValueError(f"cannot get {k} in a row on a {m}x{n} board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.size = m * n
+
+        # Bit masks of every run of k cells, and the runs through each cell
+        self.lines = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.lines.append(sum(
+                            1 << ((i + di * step) * n + j + dj * step) for step in range(k)
+                        ))
+        self.cell_lines = [
+            [line for line in self.lines if line >> cell & 1] for cell in range(self.size)
+        ]
+
+        # Cells nearest the center first, since they lie on the most lines
+        self.order = sorted(
+            range(self.size),
+            key=lambda cell: (abs(cell // n - (m - 1) / 2) + abs(cell % n - (n - 1) / 2), cell)
+        )
+
+        # Heuristic score of a line holding marks of only one player,
+        # by number of marks
+        self.scores = [0] + [4 ** count for count in range(1, k)] + [0]
+
+        # Statistics of the last search: positions searched and the
+        # deepest search completed
+        self.nodes = 0
+        self.depth = 0
+        self.deadline = math.inf
+        self.hints = {}
+
+        # Worker processes for parallel searches, started on first use
+        self.pool = None
+        self.pool_workers = 0
+        self.bound = None
+        self.searches = 0
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x, o = self.encode(board)
+        return X if x.bit_count() == o.bit_count() else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {
+            (i, j) for i in range(self.m) for j in range(self.n) if board[i][j] == EMPTY
+        }
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n) or board[i][j] != EMPTY:
+            raise ValueError(action)
+        new_board = [list(row) for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        x, o = self.encode(board)
+        for line in self.lines:
+            if x & line == line:
+                return X
+            if o & line == line:
+                return O
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        x, o = self.encode(board)
+        return self.winner(board) is not None or (x | o).bit_count() == self.size
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return {X: 1, O: -1, None: 0}[self.winner(board)]
+
+    def encode(self, board):
+        """
+        Returns the cells of X and of O on the board as two bit sets.
+        """
+        x = o = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == X:
+                    x |= 1 << (i * self.n + j)
+                elif cell == O:
+                    o |= 1 << (i * self.n + j)
+        return x, o
+
+    def minimax(self, board, budget=1.0, max_depth=None, workers=None):
+        """
+        Returns the best action found for the current player on the
+        board within `budget` seconds, or None if the game is over.
+
+        Runs alpha-beta searches one move deeper each time, scoring the
+        positions at the depth limit heuristically, and answers with
+        the best move of the deepest search finished in time. A search
+        deep enough to reach every finished game plays perfectly.
+        With `workers`, each search scores the actions in that many
+        processes at once.
+        """
+        if self.terminal(board):
+            return None
+        self.deadline = time.monotonic() + budget
+        self.nodes = 0
+        self.depth = 0
+        self.hints = {}
+        x, o = self.encode(board)
+        empty = self.size - (x | o).bit_count()
+        if max_depth is None or max_depth > empty:
+            max_depth = empty
+
+        best = next(cell for cell in self.order if not (x | o) >> cell & 1)
+        for depth in range(1, max_depth + 1):
+            try:
+                if workers:
+                    value, move = self.parallel_search(x, o, depth, workers, best)
+                else:
+                    value, move = self.search(x, o, depth, -math.inf, math.inf, 0)
+            except Timeout:
+                break
+            best = move
+            self.depth = depth
+            # A forced win or loss will not change with more depth
+            if abs(value) > WIN - self.size:
+                break
+        return divmod(best, self.n)
+
+    def search(self, x, o, depth, alpha, beta, ply):
+        """
+        Returns (value, cell) for the position with X's cells x and O's
+        cells o, searched `depth` moves ahead: its value for X within the
+        (alpha, beta) window, and the best cell to play.
+        """
+        self.nodes += 1
+        if self.nodes % CLOCK_INTERVAL == 0 and time.monotonic() > self.deadline:
+            raise Timeout
+        filled = x | o
+        count = filled.bit_count()
+        if count == self.size:
+            return 0, None
+        if depth == 0:
+            return self.evaluate(x, o), None
+
+        moves = [cell for cell in self.order if not filled >> cell & 1]
+        # Try the best move of the last, shallower search first
+        hint = self.hints.get((x, o))
+        if hint is not None:
+            moves.remove(hint)
+            moves.insert(0, hint)
+
+        maximizing = count % 2 == 0
+        best = -math.inf if maximizing else math.inf
+        best_move = None
+        for cell in moves:
+            if maximizing:
+                moved = x | 1 << cell
+                if self.wins(moved, cell):
+                    value = WIN - ply - 1
+                else:
+                    value, _ = self.search(moved, o, depth - 1, alpha, beta, ply + 1)
+                if value > best:
+                    best, best_move = value, cell
+                    alpha = max(alpha, best)
+            else:
+                moved = o | 1 << cell
+                if self.wins(moved, cell):
+                    value = -(WIN - ply - 1)
+                else:
+                    value, _ = self.search(x, moved, depth - 1, alpha, beta, ply + 1)
+                if value < best:
+                    best, best_move = value, cell
+                    beta = min(beta, best)
+            if alpha >= beta:
+                break
+        self.hints[(x, o)] = best_move
+        return best, best_move
+
+    def parallel_search(self, x, o, depth, workers, first):
+        """
+        Returns (value, cell) like search, from a search of each action
+        in a worker process, trying the cell `first` first.
+
+        Workers share the best value found so far for the player to
+        move, and search each action only for whether it beats that.
+        """
+        if self.pool is None or self.pool_workers != workers:
+            self.close()
+            self.bound = multiprocessing.Array("d", [0, -math.inf])
+            self.pool = ProcessPoolExecutor(
+                workers, initializer=_start_worker, initargs=(self.m, self.n, self.k, self.bound)
+            )
+            self.pool_workers = workers
+        # Numbered so that searches still running from the last depth
+        # cannot change the bound
+        self.searches += 1
+        with self.bound.get_lock():
+            self.bound[:] = [self.searches, -math.inf]
+
+        filled = x | o
+        moves = [cell for cell in self.order if not filled >> cell & 1]
+        moves.remove(first)
+        moves.insert(0, first)
+        futures = [
+            self.pool.submit(_score_action, self.searches, x, o, cell, depth, self.deadline)
+            for cell in moves
+        ]
+
+        # Scores are for the player to move; a score no better than the
+        # bound it was searched with is only an upper bound, and some
+        # action searched before it scored at least that much
+        best = None
+        try:
+            for future in futures:
+                scored = future.result()
+                if scored is None:
+                    raise Timeout
+                score, cell, bound, nodes = scored
+                self.nodes += nodes
+                if score > bound and (best is None or score > best[0]):
+                    best = (score, cell)
+                    # Nothing beats winning on this move
+                    if score == WIN - 1:
+                        break
+        finally:
+            for future in futures:
+                future.cancel()
+        value, cell = best
+        return (value if filled.bit_count() % 2 == 0 else -value), cell
+
+    def close(self):
+        """
+        Stops the worker processes of parallel searches.
+        """
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+            self.pool_workers = 0
+
+    def wins(self, cells, cell):
+        """
+        Returns whether a player with `cells` has a line through `cell`.
+        """
+        for line in self.cell_lines[cell]:
+            if cells & line == line:
+                return True
+        return False
+
+    def evaluate(self, x, o):
+        """
+        Returns a heuristic value of a position for X: lines still open
+        to only one player count for that player, more so the fuller
+        they are.
+        """
+        score = 0
+        scores = self.scores
+        for line in self.lines:
+            xs = x & line
+            os = o & line
+            if xs and not os:
+                score += scores[xs.bit_count()]
+            elif os and not xs:
+                score -= scores[os.bit_count()]
+        return score
+
+
+def _start_worker(m, n, k, bound):
+    global worker_game, worker_bound
+    worker_game = Game(m, n, k)
+    worker_bound = bound
+
+
+def _score_action(search, x, o, cell, depth, deadline):
+    """
+    Searches the action `cell` in a worker process, `depth` moves deep
+    in all. Returns (score, cell, bound, nodes): its score for the player
+    making it, the shared bound it was searched against and the number
+    of positions searched, or None if the deadline passed.
+    """
+    game = worker_game
+    game.nodes = 0
+    game.deadline = deadline
+    if depth == 1:
+        # A new call to minimax, which the old move hints may not fit
+        game.hints = {}
+    if time.monotonic() > deadline:
+        return None
+    bound = worker_bound[1]
+    try:
+        if (x | o).bit_count() % 2 == 0:
+            moved = x | 1 << cell
+            if game.wins(moved, cell):
+                score = WIN - 1
+            else:
+                score, _ = game.search(moved, o, depth - 1, bound, math.inf, 1)
+        else:
+            moved = o | 1 << cell
+            if game.wins(moved, cell):
+                score = WIN - 1
+            else:
+                value, _ = game.search(x, moved, depth - 1, -math.inf, -bound, 1)
+                score = -value
+    except Timeout:
+        return None
+    with worker_bound.get_lock():
+        if worker_bound[0] == search and score > worker_bound[1]:
+            worker_bound[1] = score
+    return score, cell, bound, game.nodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play an m,n,k-game against itself")
+    parser.add_argument("m", type=int, help="number of rows")
+    parser.add_argument("n", type=int, help="number of columns")
+    parser.add_argument("k", type=int, help="marks in a row needed to win")
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds per move")
+    parser.add_argument("--workers", type=int, help="processes to search with")
+    args = parser.parse_args()
+
+    game = Game(args.m, args.n, args.k)
+    board = game.initial_state()
+    while not game.terminal(board):
+        start = time.monotonic()
+        action = game.minimax(board, args.budget, workers=args.workers)
+        print(f"{game.player(board)} plays {action} after searching {game.nodes} positions "
+              f"to depth {game.depth} in {time.monotonic() - start:.2f}s")
+        board = game.result(board, action)
+    game.close()
+    for row in board:
+        print(" ".join(cell or "." for cell in row))
+    winner = game.winner(board)
+    print("Tie." if winner is None else f"{winner} wins.")
+
+
+if __name__ == "__main__":
+    main()
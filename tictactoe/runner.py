@@ -1,6 +1,8 @@
 import pygame
 import sys
+import threading
 import time
+from concurrent.futures import Future
 
 import tictactoe as ttt
 
@@ -17,9 +19,37 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Seconds the computer takes at least to move, so its moves can be followed
+ai_delay = 0.5
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+
+
+def search_in_background(board):
+    """
+    Starts ttt.minimax on the board in a daemon thread, which does not
+    keep the program running when the window is closed, and returns a
+    future for its move.
+    """
+    future = Future()
+
+    def search():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(ttt.minimax(board))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=search, daemon=True).start()
+    return future
+
+
+# The computer searches in the background, so the window keeps
+# responding however long the search takes
+ai_future = None
+ai_started = 0
 
 while True:
 
@@ -102,7 +132,8 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = "." * (int((time.time() - ai_started) * 3) % 4)
+            title = f"Computer thinking{dots}"
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
@@ -110,13 +141,17 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
+            if ai_future is None:
+                ai_future = search_in_background(board)
+                ai_started = time.time()
+            elif ai_future.done() and time.time() - ai_started >= ai_delay:
+                try:
+                    move = ai_future.result()
+                except Exception:
+                    # Search again without the perfect-play table
+                    move = ttt.alpha_beta(board)[1]
                 board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+                ai_future = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -127,20 +162,23 @@ while True:
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
-        if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
-            againRect = again.get_rect()
-            againRect.center = againButton.center
-            pygame.draw.rect(screen, white, againButton)
-            screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+        # Offer a new game, which also abandons any search in progress
+        againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+        again = mediumFont.render("Play Again" if game_over else "Reset", True, black)
+        againRect = again.get_rect()
+        againRect.center = againButton.center
+        pygame.draw.rect(screen, white, againButton)
+        screen.blit(again, againRect)
+        click, _, _ = pygame.mouse.get_pressed()
+        if click == 1:
+            mouse = pygame.mouse.get_pos()
+            if againButton.collidepoint(mouse):
+                time.sleep(0.2)
+                user = None
+                board = ttt.initial_state()
+                # ttt.minimax cannot be stopped part way, so reset only
+                # abandons a search in progress: its thread runs on and
+                # its move is never read
+                ai_future = None
 
     pygame.display.flip()
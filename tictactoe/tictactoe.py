@@ -2,8 +2,10 @@
 Tic Tac Toe Player
 """
 
+import argparse
 import math
 import copy
+import os
 
 X = "X"
 O = "O"
@@ -23,6 +25,8 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
+    if isinstance(board, Bitboard):
+        return board.player()
     # If there are an equal number of xs and os on the board, its xs turn else its os
     if sum(list.count(X) for list in board) == sum(list.count(O) for list in board):
         return X
@@ -34,6 +38,8 @@ def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
+    if isinstance(board, Bitboard):
+        return {divmod(cell, 3) for cell in board.actions()}
     moves = set()
     for i in range(3):
         for j in range(3):
@@ -46,6 +52,13 @@ def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
+    if isinstance(board, Bitboard):
+        i, j = action
+        if not (0 <= i < 3 and 0 <= j < 3) or board.filled() >> (i * 3 + j) & 1:
+            raise ValueError(action)
+        newBoard = board.copy()
+        newBoard.make(i * 3 + j)
+        return newBoard
     if action not in actions(board):
         raise ValueError(action)
     i, j = action
@@ -61,6 +74,8 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
+    if isinstance(board, Bitboard):
+        return board.winner()
     # Check for horizontal winner
     for i in range(3):
         if board[i][0] == board[i][1] and board[i][1] == board[i][2] and board[i][0] != EMPTY:
@@ -81,6 +96,8 @@ def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
+    if isinstance(board, Bitboard):
+        return board.terminal()
     if winner(board) != None or not any(EMPTY in list for list in board):
         return True
     else:
@@ -98,7 +115,239 @@ def utility(board):
     elif terminal(board):
         return 0
 
+
+def _lines():
+    """
+    Returns the bit masks of the 8 lines of three cells, with bit
+    i * 3 + j standing for cell (i, j).
+    """
+    lines = []
+    for k in range(3):
+        lines.append(sum(1 << (k * 3 + j) for j in range(3)))
+        lines.append(sum(1 << (i * 3 + k) for i in range(3)))
+    lines.append(sum(1 << (k * 3 + k) for k in range(3)))
+    lines.append(sum(1 << (k * 3 + 2 - k) for k in range(3)))
+    return lines
+
+
+LINES = _lines()
+FULL = (1 << 9) - 1
+
+# WINNING[cells] is 1 if the 9-bit set of cells holds a whole line
+WINNING = bytearray(1 << 9)
+for _cells in range(1 << 9):
+    WINNING[_cells] = any(_cells & line == line for line in LINES)
+
+
+class Bitboard():
+    """
+    Board with the cells of X and of O packed into two 9-bit integers,
+    bit i * 3 + j standing for cell (i, j). Moves are made and unmade in
+    place, so searching needs no copies, and a whole line is found with
+    a single table lookup. board[i][j] reads cells as for a list board,
+    and all the functions above accept a Bitboard.
+    """
+
+    __slots__ = ("x", "o", "count")
+
+    def __init__(self, x=0, o=0):
+        self.x = x
+        self.o = o
+        self.count = x.bit_count() + o.bit_count()
+
+    @classmethod
+    def from_board(cls, board):
+        if isinstance(board, Bitboard):
+            return board.copy()
+        x = o = 0
+        for i in range(3):
+            for j in range(3):
+                if board[i][j] == X:
+                    x |= 1 << (i * 3 + j)
+                elif board[i][j] == O:
+                    o |= 1 << (i * 3 + j)
+        return cls(x, o)
+
+    def to_board(self):
+        return [self[i] for i in range(3)]
+
+    def copy(self):
+        return Bitboard(self.x, self.o)
+
+    def __getitem__(self, i):
+        row = []
+        for j in range(3):
+            bit = 1 << (i * 3 + j)
+            row.append(X if self.x & bit else O if self.o & bit else EMPTY)
+        return row
+
+    def __eq__(self, other):
+        return isinstance(other, Bitboard) and self.x == other.x and self.o == other.o
+
+    def __hash__(self):
+        return self.x << 9 | self.o
+
+    def __repr__(self):
+        return f"Bitboard({self.x:#011b}, {self.o:#011b})"
+
+    def filled(self):
+        return self.x | self.o
+
+    def player(self):
+        return X if self.count % 2 == 0 else O
+
+    def actions(self):
+        """
+        Returns the empty cells, as i * 3 + j.
+        """
+        free = FULL & ~(self.x | self.o)
+        return [cell for cell in range(9) if free >> cell & 1]
+
+    def make(self, cell):
+        """
+        Puts the current player's mark on an empty cell.
+        """
+        if self.count % 2 == 0:
+            self.x |= 1 << cell
+        else:
+            self.o |= 1 << cell
+        self.count += 1
+
+    def unmake(self, cell):
+        """
+        Takes back the move made on a cell.
+        """
+        self.x &= ~(1 << cell)
+        self.o &= ~(1 << cell)
+        self.count -= 1
+
+    def winner(self):
+        if WINNING[self.x]:
+            return X
+        if WINNING[self.o]:
+            return O
+        return None
+
+    def terminal(self):
+        return self.count == 9 or WINNING[self.x] == 1 or WINNING[self.o] == 1
+
+
+# Order to try moves in for alpha-beta search: center, corners, then edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2), (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# The same order as cells i * 3 + j
+CELL_ORDER = [i * 3 + j for i, j in MOVE_ORDER]
+
+# Number of positions visited by the last call to minimax
+nodes = 0
+
+
+def _symmetries():
+    """
+    Returns the 8 rotations and reflections of the board, each as a list
+    giving the cell (i * 3 + j) that moves to each cell of the result.
+    """
+    symmetries = []
+    for reflect in (False, True):
+        for turns in range(4):
+            symmetry = []
+            for cell in range(9):
+                i, j = divmod(cell, 3)
+                for _ in range(turns):
+                    i, j = j, 2 - i
+                if reflect:
+                    j = 2 - j
+                symmetry.append(i * 3 + j)
+            symmetries.append(symmetry)
+    return symmetries
+
+
+SYMMETRIES = _symmetries()
+
+# PERMUTED[s][cells] is the 9-bit set of cells moved by SYMMETRIES[s]
+PERMUTED = [
+    [sum(1 << k for k, cell in enumerate(symmetry) if cells >> cell & 1) for cells in range(1 << 9)]
+    for symmetry in SYMMETRIES
+]
+
+# Cell codes of boards given as numbers
+CELL_CODES = {EMPTY: 0, X: 1, O: 2}
+
+# TERNARY[cells] is the base-3 number with a 1 for each cell in the
+# 9-bit set, cell 0 as the most significant digit
+TERNARY = [sum(3 ** (8 - cell) for cell in range(9) if cells >> cell & 1) for cells in range(1 << 9)]
+
+# File holding the perfect-play table, built on first use
+TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictactoe.table")
+
+# Table entries: (value + 1) * 16 + best cell, with NO_MOVE as the cell
+# for finished games, or UNREACHABLE for boards that never occur in play
+NO_MOVE = 0x0F
+UNREACHABLE = 0xFF
+
+# Start of a perfect-play table file, with the version of its layout
+TABLE_MAGIC = b"TTTPLAY1"
+
+# Contents of the perfect-play table once loaded
+perfect_table = None
+
+# Kinds of value in the transposition table: exact, or a bound found
+# when the search was cut off
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Canonical board code -> (value, bound, best cell in canonical order),
+# kept for the life of the process
+transpositions = {}
+
+
+def batch_outcomes(boards):
+    """
+    Returns (winners, terminals, utilities) for a NumPy array of boards,
+    as arrays of 0 for no winner, 1 for X or 2 for O, of whether each
+    game is over, and of utility(board) (0 for unfinished games).
+
+    Boards are either an (N, 3, 3) array of cells, as X/O/EMPTY or as
+    0 for empty, 1 for X and 2 for O, or bit-packed as an (N, 2) array
+    of Bitboard (x, o) pairs or an (N,) array of x << 9 | o.
+    """
+    import numpy as np
+    x, o = _batch_cells(np, np.asarray(boards))
+    winning = np.frombuffer(WINNING, dtype=np.uint8).astype(bool)
+    x_wins = winning[x]
+    o_wins = winning[o] & ~x_wins
+    winners = np.where(x_wins, 1, np.where(o_wins, 2, 0)).astype(np.int8)
+    terminals = x_wins | o_wins | ((x | o) == FULL)
+    utilities = x_wins.astype(np.int8) - o_wins.astype(np.int8)
+    return winners, terminals, utilities
+
+
+def _batch_cells(np, boards):
+    """
+    Returns the 9-bit sets of X's and of O's cells for an array of boards.
+    """
+    if boards.ndim == 3 and boards.shape[1:] == (3, 3):
+        cells = boards.reshape(len(boards), 9)
+        if cells.dtype.kind in "OU":
+            xs, os = cells == X, cells == O
+        elif cells.dtype.kind in "iu":
+            xs, os = cells == CELL_CODES[X], cells == CELL_CODES[O]
+        else:
+            raise ValueError(f"expected cells as X/O/EMPTY or integer codes, not {cells.dtype}")
+        weights = 1 << np.arange(9)
+        return xs @ weights, os @ weights
+    if boards.dtype.kind not in "iu":
+        raise ValueError(f"expected bit-packed boards as integers, not {boards.dtype}")
+    if boards.ndim == 2 and boards.shape[1] == 2:
+        return boards[:, 0].astype(np.intp), boards[:, 1].astype(np.intp)
+    if boards.ndim == 1:
+        boards = boards.astype(np.intp)
+        return boards >> 9, boards & FULL
+    raise ValueError(f"expected boards of shape (N, 3, 3), (N, 2) or (N,), not {boards.shape}")
+
+
 def min_value(board):
+    global nodes
+    nodes += 1
     if terminal(board):
         return utility(board)
     v = float('inf')
@@ -107,6 +356,8 @@ def min_value(board):
     return v
 
 def max_value(board):
+    global nodes
+    nodes += 1
     if terminal(board):
         return utility(board)
     v = float('-inf')
@@ -114,9 +365,260 @@ def max_value(board):
         v = max(v, min_value(result(board,action)))
     return v
 
-def minimax(board):
+
+def ordered_actions(board):
+    """
+    Returns the possible actions on the board, most promising first.
+    """
+    return [(i, j) for i, j in MOVE_ORDER if board[i][j] == EMPTY]
+
+
+def alpha_beta(board, alpha=-math.inf, beta=math.inf, use_table=True):
+    """
+    Returns (value, action) for the board: its minimax value and the
+    best action for the current player, searching only what can change
+    the outcome within the (alpha, beta) window.
+
+    With `use_table`, results are kept in the transposition table,
+    shared by all positions that are symmetries of each other.
+    """
+    value, cell = _alpha_beta(Bitboard.from_board(board), alpha, beta, use_table)
+    return value, None if cell is None else divmod(cell, 3)
+
+
+def _alpha_beta(board, alpha, beta, use_table):
+    """
+    alpha_beta on a Bitboard, which it changes while searching but
+    leaves as it was. Returns (value, cell).
+    """
+    global nodes
+    nodes += 1
+    if WINNING[board.x]:
+        return 1, None
+    if WINNING[board.o]:
+        return -1, None
+    if board.count == 9:
+        return 0, None
+    filled = board.x | board.o
+    moves = [cell for cell in CELL_ORDER if not filled >> cell & 1]
+
+    if use_table:
+        code, symmetry = canonical(board)
+        entry = transpositions.get(code)
+        if entry is not None:
+            value, bound, cell = entry
+            move = symmetry[cell]
+            if (bound == EXACT or (bound == LOWER and value >= beta)
+                    or (bound == UPPER and value <= alpha)):
+                return value, move
+            # Otherwise try the move that was best last time first
+            moves.remove(move)
+            moves.insert(0, move)
+
+    maximizing = board.count % 2 == 0
+    window = (alpha, beta)
+    best = -math.inf if maximizing else math.inf
+    best_move = None
+    for cell in moves:
+        board.make(cell)
+        value, _ = _alpha_beta(board, alpha, beta, use_table)
+        board.unmake(cell)
+        if maximizing and value > best:
+            best, best_move = value, cell
+            alpha = max(alpha, best)
+        elif not maximizing and value < best:
+            best, best_move = value, cell
+            beta = min(beta, best)
+        if alpha >= beta:
+            break
+
+    if use_table:
+        # A value outside the window is only a bound on the true value
+        if best <= window[0]:
+            bound = UPPER
+        elif best >= window[1]:
+            bound = LOWER
+        else:
+            bound = EXACT
+        transpositions[code] = (best, bound, symmetry.index(best_move))
+    return best, best_move
+
+
+def canonical(board):
+    """
+    Returns (code, symmetry) for the board, where code is the smallest
+    encoding (X's cells above O's, 18 bits) of the board over its 8
+    symmetries and symmetry is the permutation of cells that gives it.
+    """
+    if not isinstance(board, Bitboard):
+        board = Bitboard.from_board(board)
+    x = board.x
+    o = board.o
+    best = None
+    for symmetry, permuted in zip(SYMMETRIES, PERMUTED):
+        code = permuted[x] << 9 | permuted[o]
+        if best is None or code < best[0]:
+            best = (code, symmetry)
+    return best
+
+
+def clear_transpositions():
+    """
+    Empties the transposition table.
+    """
+    transpositions.clear()
+
+
+def board_index(board):
+    """
+    Returns the board as a base-3 number, reading cells row by row
+    as 0 for empty, 1 for X and 2 for O.
+    """
+    if not isinstance(board, Bitboard):
+        board = Bitboard.from_board(board)
+    return TERNARY[board.x] + 2 * TERNARY[board.o]
+
+
+def build_table(path=TABLE):
+    """
+    Solves every board reachable in play and writes the perfect-play
+    table to `path`. Returns the table.
+    """
+    table = solve_table()
+    save_table(table, path)
+    return table
+
+
+def solve_table():
+    """
+    Returns the perfect-play table, one byte per base-3 board index,
+    for every board reachable in play.
+    """
+    table = bytearray([UNREACHABLE]) * 3 ** 9
+
+    def solve(board):
+        index = board_index(board)
+        if table[index] != UNREACHABLE:
+            return (table[index] >> 4) - 1
+        if board.terminal():
+            value = utility(board)
+            table[index] = (value + 1) << 4 | NO_MOVE
+            return value
+        maximizing = board.count % 2 == 0
+        best = None
+        for cell in CELL_ORDER:
+            if board.filled() >> cell & 1:
+                continue
+            board.make(cell)
+            value = solve(board)
+            board.unmake(cell)
+            if best is None or (value > best[0] if maximizing else value < best[0]):
+                best = (value, cell)
+        table[index] = (best[0] + 1) << 4 | best[1]
+        return best[0]
+
+    solve(Bitboard())
+    return bytes(table)
+
+
+def save_table(table, path=TABLE):
+    """
+    Writes the perfect-play table to `path` after TABLE_MAGIC.
+    """
+    # Another game starting meanwhile reads either the old table or
+    # the whole new one, never part of it
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(TABLE_MAGIC)
+            f.write(table)
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        raise
+
+
+def load_table(path=TABLE):
+    """
+    Returns the perfect-play table, reading it from `path` the first
+    time, or building it if it is missing or does not look right. A
+    table built here is saved to `path` if it can be.
+    """
+    global perfect_table
+    if perfect_table is None:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            data = b""
+        table = data[len(TABLE_MAGIC):]
+        if data[:len(TABLE_MAGIC)] == TABLE_MAGIC and len(table) == 3 ** 9 and _table_looks_right(table):
+            perfect_table = table
+        else:
+            perfect_table = solve_table()
+            try:
+                save_table(perfect_table, path)
+            except OSError:
+                pass
+    return perfect_table
+
+
+def _table_looks_right(table):
+    """
+    Checks a few entries of a table whose answers are known.
+    """
+    won = Bitboard.from_board([[X, X, X], [O, O, EMPTY], [EMPTY, EMPTY, EMPTY]])
+    return (
+        table[board_index(Bitboard())] == (0 + 1) << 4 | CELL_ORDER[0]
+        and table[board_index(won)] == (1 + 1) << 4 | NO_MOVE
+        and table[board_index(Bitboard(0b111, 0b111000))] == UNREACHABLE
+    )
+
+
+def perfect_play(board):
+    """
+    Returns (value, action) for a board reachable in play from the
+    perfect-play table, with None as the action if the game is over,
+    or None for a board that cannot occur in play.
+    """
+    entry = load_table()[board_index(board)]
+    if entry == UNREACHABLE:
+        return None
+    cell = entry & NO_MOVE
+    return (entry >> 4) - 1, None if cell == NO_MOVE else divmod(cell, 3)
+
+
+def minimax(board, pruning=True, use_table=True, lookup=None):
     """
     Returns the optimal action for the current player on the board.
+
+    With `lookup` (by default, only when pruning), boards reachable in
+    play are answered from the perfect-play table. Otherwise, with pruning, uses alpha-beta search
+    with the most promising moves first, and with `use_table` reuses the
+    results of earlier searches from the transposition table; without
+    pruning, searches the whole game tree. All find a move of the same
+    value, and `nodes` counts the positions searched.
+    """
+    global nodes
+    nodes = 0
+    if lookup is None:
+        lookup = pruning
+    if lookup:
+        found = perfect_play(board)
+        if found is not None:
+            return found[1]
+    if not pruning:
+        return exhaustive_minimax(board)
+    return alpha_beta(board, use_table=use_table)[1]
+
+
+def exhaustive_minimax(board):
+    """
+    Returns the optimal action for the current player on the board,
+    searching the whole game tree.
     """
     if player(board) == X:
         max = -100
@@ -139,3 +641,34 @@ def minimax(board):
                 min = move_value
                 best_move = action
     return best_move
+
+
+def compare_node_counts(board):
+    """
+    Returns the number of positions visited by minimax on the board
+    without and with alpha-beta pruning, and with the transposition
+    table as well, starting from an empty table.
+    """
+    minimax(board, pruning=False)
+    exhaustive = nodes
+    minimax(board, use_table=False, lookup=False)
+    pruned = nodes
+    saved = dict(transpositions)
+    clear_transpositions()
+    minimax(board, lookup=False)
+    tabled = nodes
+    transpositions.update(saved)
+    return exhaustive, pruned, tabled
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tic Tac Toe engine")
+    parser.add_argument("--build-table", action="store_true",
+                        help=f"solve every board and write the perfect-play table to {TABLE}")
+    if parser.parse_args().build_table:
+        table = build_table()
+        print(f"Solved {sum(entry != UNREACHABLE for entry in table)} boards into {TABLE}")
+        raise SystemExit
+    exhaustive, pruned, tabled = compare_node_counts(initial_state())
+    print(f"Positions searched for the first move: {exhaustive} exhaustive, {pruned} with alpha-beta, "
+          f"{tabled} with alpha-beta and transpositions")